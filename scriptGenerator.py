@@ -6,18 +6,21 @@
 # -------------------------------
 # Standard library imports
 # -------------------------------
+import io
 import os
 import sys
 import csv                       # For reading server/database CSV
+import codecs                    # For detecting the CSV encoding
+import threading                 # For opening the output folder in the background
+import time                      # For timestamped output filenames
 from pathlib import Path         # For safe Windows path handling
-from datetime import datetime    # For timestamped output filenames
 
 # -------------------------------
 # GUI imports (Tkinter)
 # -------------------------------
 
-import tkinter as tk
-from tkinter import filedialog, messagebox
+# tkinter is imported inside the GUI functions, so importing this module
+# to call generate_sqlcmd does not load Tk
 
 
 # -------------------------------
@@ -27,6 +30,81 @@ from tkinter import filedialog, messagebox
 TOOL_NAME = "SQLCMD Multi-Server Script Generator"
 TOOL_VERSION = "1.0.1"
 
+# Buffer size for reading the CSV and writing the SQLCMD file (1 MiB)
+IO_BUFFER_SIZE = 1 << 20
+
+# Shown when the CSV cannot be decoded with any supported encoding
+CSV_ENCODING_ERROR = (
+    "Unable to read CSV file.\n"
+    "Please save the file as 'CSV UTF-8' and try again."
+)
+
+# -------------------------------
+# SQLCMD templates
+# -------------------------------
+
+# Banner at the top of every generated script. The indentation inside the
+# literal is part of the output and is kept as is.
+SQLCMD_BANNER = """/*****************************************************************************************
+    ******************************************************************************************
+    **                                                                                      **
+    **                                                                                      **
+    **                                                                                      **
+    **                                                                                      **
+    **   SQLCMD MODE REQUIRED                                                               **
+    **                                                                                      **
+    **   IMPORTANT: This script uses SQLCMD directives and will FAIL if                     **
+    **   SQLCMD Mode is not enabled.                                                        **
+    **                                                                                      **
+    **   REQUIRED STEPS IN SSMS:                                                            **
+    **                                                                                      **
+    **                Query -> SQLCMD Mode                                                  **
+    **                                                                                      **
+    **                                                                                      **
+    **                                                                                      **
+    **                                                                                      **
+    ******************************************************************************************
+    ******************************************************************************************/
+    """
+
+# Optional PCB line, written between the banner and the variables
+PCB_TEMPLATE = "-- PCB: {pcb}\n\n"
+
+# SQLCMD variables, the only header part that depends on the inputs
+SETVAR_TEMPLATE = (
+    "\n"
+    ':setvar USERNAME "{username}"\n'
+    ':setvar PASSWORD "{password}"\n'
+    ':setvar SCRIPT "{script}"\n'
+)
+
+# Invariant header parts, encoded once with platform line endings
+BANNER_BYTES = (SQLCMD_BANNER + "\n\n").replace("\n", os.linesep).encode("utf-8")
+BEGIN_EXECUTION_BYTES = (
+    "\n"
+    "------------------------------------------------------------\n"
+    "-- BEGIN EXECUTION\n"
+    "------------------------------------------------------------\n"
+    "\n"
+).replace("\n", os.linesep).encode("utf-8")
+
+# One execution block per CSV row, pre-joined so each row is a single write.
+# Filled with %-formatting: (row number, database, server, server, database).
+# Line endings are converted once here because the output is written in
+# binary mode (CRLF on Windows, as the text-mode writer produced).
+BLOCK_TEMPLATE = (
+    "\n"
+    "PRINT '--- [%d] %s on %s ---'\n"
+    ":CONNECT %s -U $(USERNAME) -P $(PASSWORD)\n"
+    "USE [%s];\n"
+    "GO\n"
+    ":r $(SCRIPT)\n"
+    "GO\n"
+    "PRINT ''\n"
+    "PRINT '---------------------------------------------------------------------------------------------'\n"
+    "PRINT ''\n"
+).replace("\n", os.linesep)
+
 # -------------------------------
 # Global variables
 # -------------------------------
@@ -36,6 +114,7 @@ sql_entry = None
 username_entry = None
 password_entry = None
 pcb_entry = None
+generate_button = None
 
 # -------------------------------
 # Core logic: Generate SQLCMD file
@@ -51,129 +130,126 @@ def generate_sqlcmd(csv_path: Path, sql_script_path: Path,
 
     # Output file location = same folder as CSV
     output_dir = csv_path.parent / "multiDB_script"
-    output_dir.mkdir(exist_ok=True)
 
     # Create a timestamp so each run produces a unique file
-    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    # (formatted from the fields directly, same as "%Y%m%d_%H%M%S")
+    now = time.localtime()
+    timestamp = (f"{now.tm_year:04d}{now.tm_mon:02d}{now.tm_mday:02d}_"
+                 f"{now.tm_hour:02d}{now.tm_min:02d}{now.tm_sec:02d}")
 
     # Example: run_all_20260103_220915.sql
     pcb_suffix = f"_{pcb}" if pcb else ""
     output_filename = f"{sql_script_path.stem}{pcb_suffix}_multiDB_{timestamp}.sql"
     output_file = output_dir / output_filename
 
-    # Accumulate all lines of the SQLCMD script
-    lines = []
-
     # -------------------------------
     # SQLCMD header
     # -------------------------------
 
-    SQLCMD_BANNER = """/*****************************************************************************************
-    ******************************************************************************************
-    **                                                                                      **
-    **                                                                                      **
-    **                                                                                      **
-    **                                                                                      **
-    **   SQLCMD MODE REQUIRED                                                               **
-    **                                                                                      **
-    **   IMPORTANT: This script uses SQLCMD directives and will FAIL if                     **
-    **   SQLCMD Mode is not enabled.                                                        **
-    **                                                                                      **
-    **   REQUIRED STEPS IN SSMS:                                                            **
-    **                                                                                      **
-    **                Query -> SQLCMD Mode                                                  **
-    **                                                                                      **
-    **                                                                                      **
-    **                                                                                      **
-    **                                                                                      **
-    ******************************************************************************************
-    ******************************************************************************************/
-    """
-    lines.extend([
-        SQLCMD_BANNER,
-        "",
-    ])
-
     # OPTIONAL PCB HEADER
-    if pcb:
-        lines.extend([
-            f"-- PCB: {pcb}",
-            ""
-        ])
-
-
-    lines.extend([
-        "",
-        f':setvar USERNAME "{username}"',
-        f':setvar PASSWORD "{password}"',
-        f':setvar SCRIPT "{sql_script_path}"',
-        "",
-        "------------------------------------------------------------",
-        "-- BEGIN EXECUTION",
-        "------------------------------------------------------------",
-        "",
-        ""
-    ])
+    pcb_header = PCB_TEMPLATE.format(pcb=pcb) if pcb else ""
+
+    header_vars = pcb_header + SETVAR_TEMPLATE.format(
+        username=username, password=password, script=sql_script_path
+    )
 
     # -------------------------------
-    # Read CSV and generate blocks
+    # Read CSV and stream blocks to disk
     # -------------------------------
 
     with open_csv_safely(csv_path) as f:
-        reader = csv.DictReader(f)
+        reader = csv.reader(f)
+        header = next(reader, None)
 
-        # Validate headers ONCE
-        if reader.fieldnames != ["server", "database"]:
+        # Validate headers ONCE (before the output file is created)
+        if header != ["server", "database"]:
             raise ValueError(
                 "Invalid CSV headers.\n\n"
                 "CSV header must contain exactly:\n"
                 "server,database"
             )
 
-        for i, row in enumerate(reader, start=1):
-            server = row["server"].strip()
-            database = row["database"].strip()
-
-            lines.extend([
-                f"PRINT '--- [{i}] {database} on {server} ---'",
-                f":CONNECT {server} -U $(USERNAME) -P $(PASSWORD)",
-                f"USE [{database}];",
-                "GO",                
-                ":r $(SCRIPT)",
-                "GO",
-                "PRINT ''",
-                "PRINT '---------------------------------------------------------------------------------------------'",
-                "PRINT ''",
-                ""
-            ])
-
-    # Write final SQLCMD file to disk
-    output_file.write_text("\n".join(lines), encoding="utf-8")
+        # Resolve column positions once; rows are indexed by position
+        server_idx = header.index("server")
+        database_idx = header.index("database")
+
+        # Output folder is created only once the CSV has opened and validated
+        output_dir.mkdir(exist_ok=True)
+
+        # Write each block as soon as it is built; the large buffer
+        # batches the small writes into a few large ones. Blocks are
+        # encoded to UTF-8 bytes directly, skipping the text-mode layer.
+        try:
+            with output_file.open("wb", buffering=IO_BUFFER_SIZE) as out:
+                out.write(BANNER_BYTES)
+                out.write(_encode(header_vars))
+                out.write(BEGIN_EXECUTION_BYTES)
+
+                # filter(None, ...) skips blank lines, as DictReader did
+                for i, row in enumerate(filter(None, reader), start=1):
+                    server = row[server_idx].strip()
+                    database = row[database_idx].strip()
+
+                    out.write((BLOCK_TEMPLATE % (i, database, server, server, database))
+                              .encode("utf-8"))
+
+        except BaseException as e:
+            # Never leave a half-written script behind: it would run
+            # against only part of the server list
+            output_file.unlink(missing_ok=True)
+
+            # Bad bytes past the block the encoding was detected from
+            if isinstance(e, UnicodeDecodeError):
+                raise ValueError(CSV_ENCODING_ERROR) from None
+
+            # A row with fewer than two fields
+            if isinstance(e, IndexError):
+                raise ValueError(
+                    f"Invalid CSV row on line {reader.line_num}.\n\n"
+                    "Each row must contain:\n"
+                    "server,database"
+                ) from None
+            raise
+
     # Open output folder automatically on Windows
+    # (in the background: Explorer can take a while to start)
     if sys.platform.startswith("win"):
-        os.startfile(output_dir)
+        threading.Thread(target=os.startfile, args=(str(output_dir),)).start()
 
     return output_file
 
+def _encode(text: str) -> bytes:
+    """
+    Encodes text for the SQLCMD output file
+    Uses the platform line ending, as a text-mode write would
+    """
+    return text.replace("\n", os.linesep).encode("utf-8")
+
 def open_csv_safely(csv_path: Path):
     """
-    Attempts to open CSV using common encodings used on Windows.
+    Opens CSV using the first common Windows encoding that decodes it.
+    The encoding is picked from the first buffered block of bytes,
+    so the file is only opened once.
     Fails gracefully with a clear error if none work.
     """
     encodings_to_try = ["utf-8-sig", "cp1252"]
 
-    last_error = None
+    try:
+        raw = csv_path.open("rb", buffering=IO_BUFFER_SIZE)
+    except FileNotFoundError:
+        raise FileNotFoundError("CSV file not found.") from None
+    head = raw.peek(IO_BUFFER_SIZE)
 
     for encoding in encodings_to_try:
         try:
-            return csv_path.open(newline="", encoding=encoding)
-        except UnicodeDecodeError as e:
-            last_error = e
+            # final=False: a character cut at the end of the block is fine
+            codecs.getincrementaldecoder(encoding)().decode(head, final=False)
+        except UnicodeDecodeError:
+            continue
+        return io.TextIOWrapper(raw, encoding=encoding, newline="")
 
-    raise ValueError(
-        "Unable to read CSV file.\n"
-        "Please save the file as 'CSV UTF-8' and try again."
-    )
+    raw.close()
+    raise ValueError(CSV_ENCODING_ERROR)
 
 # -------------------------------
 # GUI helper functions
@@ -181,6 +257,9 @@ def open_csv_safely(csv_path: Path):
 
 def browse_csv():
     """Select CSV file and populate textbox"""
+    import tkinter as tk
+    from tkinter import filedialog
+
     path = filedialog.askopenfilename(filetypes=[("CSV Files", "*.csv")])
     if path:
         csv_entry.delete(0, tk.END)
@@ -189,6 +268,9 @@ def browse_csv():
 
 def browse_sql():
     """Select SQL script file and populate textbox"""
+    import tkinter as tk
+    from tkinter import filedialog
+
     path = filedialog.askopenfilename(
         filetypes=[("SQL Files", "*.sql")]
     )
@@ -200,8 +282,12 @@ def browse_sql():
 def run_tool():
     """
     Triggered when user clicks Generate
-    Validates inputs and runs SQLCMD generator
+    Validates inputs and runs SQLCMD generator on a worker thread,
+    so the window stays responsive on large CSVs
     """
+    import tkinter as tk
+    from tkinter import messagebox
+
     try:
         csv_path = Path(csv_entry.get())
         sql_path = Path(sql_entry.get())
@@ -210,25 +296,45 @@ def run_tool():
         pcb = pcb_entry.get().strip()
 
         # Input validation
-        if not csv_path.exists():
-            raise FileNotFoundError("CSV file not found.")
-        if not sql_path.exists():
+        # (a missing CSV is reported when generate_sqlcmd opens it)
+        if not sql_path.is_file():
             raise FileNotFoundError("SQL script file not found.")
         if not username:
             username = "username"
         if not password:
             password = "password"
 
-        # Generate SQLCMD file
-        output = generate_sqlcmd(csv_path, sql_path, username, password, pcb)
-
-        messagebox.showinfo(
-            "Success",
-            f"SQLCMD script generated:\n{output}"
-        )
-
     except Exception as e:
         messagebox.showerror("Error", str(e))
+        return
+
+    def finish(title, message, show):
+        """Runs back on the Tk thread once generation is done"""
+        generate_button.config(state="normal")
+        show(title, message)
+
+    def work():
+        try:
+            # Generate SQLCMD file
+            output = generate_sqlcmd(csv_path, sql_path, username, password, pcb)
+        except Exception as e:
+            result = ("Error", str(e), messagebox.showerror)
+        else:
+            result = ("Success", f"SQLCMD script generated:\n{output}",
+                      messagebox.showinfo)
+
+        # Tk widgets may only be touched from the Tk thread
+        try:
+            generate_button.after(0, finish, *result)
+        except (RuntimeError, tk.TclError):
+            # Window was closed while generating; nothing left to notify
+            pass
+
+    # Prevent a second run (and a clashing output file) until this one ends.
+    # Not a daemon thread: closing the window mid-run lets the script finish
+    # (or clean up after itself) instead of being killed half-written.
+    generate_button.config(state="disabled")
+    threading.Thread(target=work).start()
 
 
 # -------------------------------
@@ -237,6 +343,9 @@ def run_tool():
 
 def start_gui():
     global csv_entry, sql_entry, username_entry, password_entry, pcb_entry
+    global generate_button
+
+    import tkinter as tk
 
     root = tk.Tk()
     root.title(f"{TOOL_NAME} v{TOOL_VERSION}")
@@ -306,12 +415,13 @@ def start_gui():
     # Generate button
     # -------------------------------
 
-    tk.Button(
+    generate_button = tk.Button(
         root,
         text="Generate SQLCMD Script",
         command=run_tool,
         width=35
-    ).pack(pady=20)
+    )
+    generate_button.pack(pady=20)
 
     # -------------------------------
     # Start GUI event loop
@@ -319,5 +429,42 @@ def start_gui():
 
     root.mainloop()
 
+# -------------------------------
+# Entry point
+# -------------------------------
+
+def main():
+    """
+    Starts the GUI when run without arguments
+    Otherwise generates the SQLCMD file from the command line:
+        scriptGenerator.py CSV SQL_SCRIPT [USERNAME] [PASSWORD] [PCB]
+    """
+    args = sys.argv[1:]
+    if not args:
+        start_gui()
+        return
+
+    if len(args) > 5 or len(args) < 2:
+        sys.exit("Usage: scriptGenerator.py CSV SQL_SCRIPT "
+                 "[USERNAME] [PASSWORD] [PCB]")
+
+    csv_path = Path(args[0])
+    sql_path = Path(args[1])
+    username, password, pcb = (args[2:] + ["", "", ""])[:3]
+
+    try:
+        # Same validation and defaults as the GUI
+        if not sql_path.is_file():
+            raise FileNotFoundError("SQL script file not found.")
+
+        output = generate_sqlcmd(csv_path, sql_path,
+                                 username.strip() or "username",
+                                 password.strip() or "password",
+                                 pcb.strip())
+    except Exception as e:
+        sys.exit(f"Error: {e}")
+
+    print(f"SQLCMD script generated:\n{output}")
+
 if __name__ == "__main__":
-    start_gui()
\ No newline at end of file
+    main()